@@ -1,26 +1,35 @@
-import yfinance as yf
+import argparse
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
 from datetime import datetime
 import os
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Compare the old and new portfolios since the transaction date.")
+    parser.add_argument('--plot', action='store_true', help="Plot both portfolios' value and percent change")
+    parser.add_argument('--export', action='store_true', help="Export the daily values to an Excel file in output/")
+    return parser.parse_args()
+
 def fetch_data(tickers, start_date):
-    return yf.download(tickers, start=start_date)['Adj Close']
+    import yfinance as yf
 
-def calculate_portfolio_value(data, shares):
-    return data * shares
+    # auto_adjust=False keeps the 'Adj Close' column, which newer yfinance otherwise folds into 'Close'
+    df = yf.download(tickers, start=start_date, actions=False, auto_adjust=False, progress=False)
+    # yfinance sorts the columns; restore the caller's order so they line up with shares
+    return df['Adj Close'][tickers]
 
-def plot_performance(old_portfolio, new_portfolio, start_date):
-    fig, ax1 = plt.subplots(figsize=(14, 7))
+def portfolio_metrics(prices, shares):
+    # Daily portfolio value and percent change since the first day, missing prices count as zero
+    values = np.nan_to_num(prices) @ shares
+    return values, (values / values[0] - 1.0) * 100.0
 
-    old_portfolio_value = old_portfolio.sum(axis=1)
-    new_portfolio_value = new_portfolio.sum(axis=1)
+def plot_performance(dates, old_portfolio_value, new_portfolio_value, old_portfolio_change, new_portfolio_change):
+    import matplotlib.pyplot as plt
 
-    old_portfolio_change = (old_portfolio_value / old_portfolio_value.iloc[0] - 1) * 100
-    new_portfolio_change = (new_portfolio_value / new_portfolio_value.iloc[0] - 1) * 100
+    fig, ax1 = plt.subplots(figsize=(14, 7))
 
-    ax1.plot(old_portfolio.index, old_portfolio_value, label='Old Portfolio Value (USD)', color='blue')
-    ax1.plot(new_portfolio.index, new_portfolio_value, label='New Portfolio Value (USD)', color='green')
+    ax1.plot(dates, old_portfolio_value, label='Old Portfolio Value (USD)', color='blue')
+    ax1.plot(dates, new_portfolio_value, label='New Portfolio Value (USD)', color='green')
 
     ax1.set_xlabel('Date')
     ax1.set_ylabel('Portfolio Value (USD)')
@@ -28,8 +37,8 @@ def plot_performance(old_portfolio, new_portfolio, start_date):
     ax1.grid(True)
 
     ax2 = ax1.twinx()
-    ax2.plot(old_portfolio.index, old_portfolio_change, label='Old Portfolio Change (%)', color='cyan', linestyle='--')
-    ax2.plot(new_portfolio.index, new_portfolio_change, label='New Portfolio Change (%)', color='lime', linestyle='--')
+    ax2.plot(dates, old_portfolio_change, label='Old Portfolio Change (%)', color='cyan', linestyle='--')
+    ax2.plot(dates, new_portfolio_change, label='New Portfolio Change (%)', color='lime', linestyle='--')
 
     ax2.set_ylabel('Percentage Change (%)')
     ax2.legend(loc='upper right')
@@ -38,29 +47,30 @@ def plot_performance(old_portfolio, new_portfolio, start_date):
     fig.tight_layout()
     plt.show()
 
-def export_to_excel(old_portfolio, new_portfolio):
+def export_to_excel(dates, old_portfolio_value, new_portfolio_value, old_portfolio_change, new_portfolio_change):
     # Create a directory 'output' if it doesn't exist
     if not os.path.exists('output'):
         os.makedirs('output')
 
     # Create a filename with the current date
     today = datetime.now().strftime('%Y.%m.%d')
-    filename = f'output/{today}_btc_play_history.xls'
+    filename = f'output/{today}_btc_play_history.xlsx'
 
     # Combine data into a single DataFrame
     combined_data = pd.DataFrame({
-        'Date': old_portfolio.index,
-        'Old Portfolio Value (USD)': old_portfolio.sum(axis=1),
-        'New Portfolio Value (USD)': new_portfolio.sum(axis=1),
-        'Old Portfolio Change (%)': (old_portfolio.sum(axis=1) / old_portfolio.sum(axis=1).iloc[0] - 1) * 100,
-        'New Portfolio Change (%)': (new_portfolio.sum(axis=1) / new_portfolio.sum(axis=1).iloc[0] - 1) * 100
-    }).set_index('Date')
+        'Old Portfolio Value (USD)': old_portfolio_value,
+        'New Portfolio Value (USD)': new_portfolio_value,
+        'Old Portfolio Change (%)': old_portfolio_change,
+        'New Portfolio Change (%)': new_portfolio_change
+    }, index=pd.Index(dates, name='Date'))
 
     # Export to Excel
     combined_data.to_excel(filename)
     print(f'Data exported to {filename}')
 
 def main():
+    args = parse_args()
+
     # Define the date of the transaction
     start_date = '2024-05-28'
 
@@ -71,29 +81,30 @@ def main():
     old_shares = [485.113, 40.000]
     new_shares = [25.000, 689.000]
 
-    # Fetch historical data from the start date to the present
-    old_data = fetch_data(old_tickers, start_date)
-    new_data = fetch_data(new_tickers, start_date)
+    # Fetch historical data from the start date to the present in one request
+    # float32 is plenty for percent changes and halves the memory the daily sums touch
+    data = fetch_data(old_tickers + new_tickers, start_date).astype(np.float32)
+    old_data = data[old_tickers]
+    new_data = data[new_tickers]
 
-    # Calculate the portfolio values
-    old_portfolio = calculate_portfolio_value(old_data, old_shares)
-    new_portfolio = calculate_portfolio_value(new_data, new_shares)
+    # Daily values and percent changes for both portfolios
+    old_value, old_change = portfolio_metrics(old_data.to_numpy(), np.asarray(old_shares, dtype=np.float32))
+    new_value, new_change = portfolio_metrics(new_data.to_numpy(), np.asarray(new_shares, dtype=np.float32))
 
     # Plot the performance
-    plot_performance(old_portfolio, new_portfolio, start_date)
+    if args.plot:
+        plot_performance(data.index, old_value, new_value, old_change, new_change)
 
     # Export data to Excel
-    export_to_excel(old_portfolio, new_portfolio)
+    if args.export:
+        export_to_excel(data.index, old_value, new_value, old_change, new_change)
 
     # Calculate the relative performance
-    old_value_start = old_portfolio.sum(axis=1).iloc[0]
-    new_value_start = new_portfolio.sum(axis=1).iloc[0]
-
-    old_value_current = old_portfolio.sum(axis=1).iloc[-1]
-    new_value_current = new_portfolio.sum(axis=1).iloc[-1]
-
-    old_return = (old_value_current - old_value_start) / old_value_start * 100
-    new_return = (new_value_current - new_value_start) / new_value_start * 100
+    # Widen the endpoint values to float64 before the scalar return math
+    old_start, old_end = float(old_value[0]), float(old_value[-1])
+    new_start, new_end = float(new_value[0]), float(new_value[-1])
+    old_return = (old_end - old_start) / old_start * 100
+    new_return = (new_end - new_start) / new_start * 100
 
     print(f"Old Portfolio Return: {old_return:.2f}%")
     print(f"New Portfolio Return: {new_return:.2f}%")
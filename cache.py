@@ -0,0 +1,37 @@
+import hashlib
+import os
+import pickle
+import tempfile
+import time
+from pathlib import Path
+
+CACHE_DIR = Path('.cache')
+
+def make_key(*parts):
+    return hashlib.md5('|'.join(str(part) for part in parts).encode()).hexdigest()
+
+def get(key, ttl=None):
+    path = CACHE_DIR / f'{key}.pkl'
+    try:
+        if ttl is not None and time.time() - path.stat().st_mtime > ttl:
+            return None
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+    except OSError:
+        return None
+    except Exception:
+        # Truncated files and pickles from another pandas version are misses; drop them so they get rewritten
+        path.unlink(missing_ok=True)
+        return None
+
+def put(key, value):
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    # Write to a temp file and rename so concurrent readers never see a partial pickle
+    fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, CACHE_DIR / f'{key}.pkl')
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
@@ -1,14 +1,23 @@
 import argparse
-import yfinance as yf
+import numpy as np
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from tabulate import tabulate
-from termcolor import colored
+from functools import lru_cache
 import csv
 import os
 import re
+import cache
 
 HISTORY_FILE = 'portfolio_history.csv'
+HISTORY_COLUMNS = ['name', 'portfolio', 'start_date', 'end_date']
+MAX_WORKERS = 16
+DOWNLOAD_BATCH_SIZE = 20
+FETCH_TIMEOUT = 10
+CACHE_TTL = 60 * 60
+RESULT_HEADERS = ('Ticker', 'Shares', 'Start Price', 'End Price', 'Start Value', 'End Value', 'Percent Change (%)', 'Value Change (USD)')
+COMPARISON_HEADERS = ('Name', 'Start Date', 'End Date', 'Start Value', 'End Value', 'Percent Change (%)', 'Value Change (USD)')
+_PORTFOLIO_RE = re.compile(r"([A-Za-z]+)\(([\d\.]+)\)")
 
 def parse_args():
     parser = argparse.ArgumentParser(description="Calculate portfolio value changes over a specified date range.")
@@ -19,58 +28,134 @@ def parse_args():
     parser.add_argument('--aggregate', action='store_true', help="Run aggregate of all historical executions")
     parser.add_argument('--compare', type=str, help="Compare the value change of two to five named portfolios, e.g., 'Portfolio1,Portfolio2,...'")
     parser.add_argument('--save', action='store_true', help="Save this command to the historical file")
+    parser.add_argument('--threads', type=int, default=MAX_WORKERS, help=f"Maximum date ranges downloaded concurrently for --aggregate and --compare. Defaults to {MAX_WORKERS}.")
     args = parser.parse_args()
 
+    if args.threads < 1:
+        parser.error("--threads must be at least 1.")
+
     if not args.aggregate and not args.compare:
         if not args.portfolio or not args.frm:
             parser.error("--portfolio and --from are required unless --aggregate or --compare is specified.")
 
     return args
 
-def fetch_stock_data(ticker, start_date, end_date):
-    stock = yf.Ticker(ticker)
-    df = stock.history(start=start_date, end=end_date)
-    return df
-
+def _cache_ttl(end_date):
+    # Closed date ranges are kept for good; open-ended ones expire after CACHE_TTL
+    if end_date and end_date < datetime.now().strftime('%Y-%m-%d'):
+        return None
+    return CACHE_TTL
+
+@lru_cache(maxsize=None)
+def _session():
+    from curl_cffi import requests as curl_requests
+
+    # One shared session keeps Yahoo connections alive across tickers
+    return curl_requests.Session(impersonate='chrome')
+
+def _fetch_all(keys, max_workers=MAX_WORKERS):
+    # One batched download per unique (tickers, start, end), all run concurrently
+    keys = list(dict.fromkeys(keys))
+    if not keys:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(keys))) as executor:
+        frames = executor.map(lambda key: fetch_closes(*key), keys)
+        return dict(zip(keys, frames))
+
+def fetch_windows(entries, max_workers=MAX_WORKERS):
+    # Group history entries by date range, then download every window concurrently
+    windows = {}
+    for _, portfolio_str, start_date, end_date in entries:
+        windows.setdefault((start_date, end_date), []).extend(
+            ticker for ticker, shares in parse_portfolio(portfolio_str) if shares > 0)
+    keys = [(tuple(tickers),) + window for window, tickers in windows.items()]
+    closes = _fetch_all(keys, max_workers)
+    return {key[1:]: closes[key] for key in keys}
+
+# History rows are parsed several times per run; tuples keep the cached result immutable
+@lru_cache(maxsize=2048)
 def parse_portfolio(portfolio_str):
-    pattern = r"([A-Za-z]+)\(([\d\.]+)\)"
-    matches = re.findall(pattern, portfolio_str)
-    return [(ticker, float(shares)) for ticker, shares in matches]
-
-def calculate_values(portfolio, start_date, end_date):
-    data = []
-    total_value_change = 0
-    total_start_value = 0
-    total_end_value = 0
-
-    for ticker, shares in portfolio:
-        df = fetch_stock_data(ticker, start_date, end_date)
-
-        if df.empty:
-            print(f"No data for {ticker} between {start_date} and {end_date}. Skipping.")
-            continue
-
-        start_price = df['Close'].iloc[0]
-        end_price = df['Close'].iloc[-1]
-        start_value = start_price * shares
-        end_value = end_price * shares
-        value_change = end_value - start_value
-        percent_change = (value_change / start_value) * 100
-
-        total_value_change += value_change
-        total_start_value += start_value
-        total_end_value += end_value
-
-        data.append([
-            ticker,
-            shares,
-            start_price,
-            end_price,
-            start_value,
-            end_value,
-            percent_change,
-            value_change
-        ])
+    return tuple((ticker, float(shares)) for ticker, shares in _PORTFOLIO_RE.findall(portfolio_str))
+
+def fetch_closes(tickers, start_date, end_date):
+    import yfinance as yf
+
+    # yfinance upper-cases symbols, so only upper-case tickers match its columns
+    tickers = list(dict.fromkeys(ticker.upper() for ticker in tickers))
+    # Yahoo rescales adjusted closes after every dividend, so a window is cached as one frame to keep
+    # all of its tickers on the same basis
+    key = cache.make_key(*sorted(tickers), start_date, end_date, 'Adj Close')
+    cached = cache.get(key, _cache_ttl(end_date))
+    if cached is not None:
+        return cached.reindex(columns=tickers)
+
+    # Yahoo accepts a limited number of symbols per request
+    closes = {}
+    for i in range(0, len(tickers), DOWNLOAD_BATCH_SIZE):
+        batch = tickers[i:i + DOWNLOAD_BATCH_SIZE]
+        df = yf.download(batch, start=start_date, end=end_date, group_by='column', actions=False,
+                         threads=True, progress=False, auto_adjust=False, timeout=FETCH_TIMEOUT,
+                         session=_session())
+        # Adjusted closes include dividends, matching Ticker.history's auto-adjusted default
+        batch_closes = df['Adj Close']
+        if isinstance(batch_closes, pd.Series):
+            # Older yfinance returns a flat frame for a single ticker
+            batch_closes = batch_closes.to_frame(batch[0])
+        for ticker in batch:
+            if ticker in batch_closes and batch_closes[ticker].notna().any():
+                closes[ticker] = batch_closes[ticker]
+
+    closes = pd.DataFrame(closes).reindex(columns=tickers)
+    # Only complete windows are cached, so a ticker that failed to download is retried next run
+    if tickers and closes.notna().any().all():
+        cache.put(key, closes)
+    return closes
+
+def _endpoints(closes):
+    # First and last available close per column, NaN where a column has no data
+    prices = closes.to_numpy(dtype=float)
+    has_price = ~np.isnan(prices)
+    if not has_price.size:
+        missing = np.full(prices.shape[1], np.nan)
+        return missing, missing
+    columns = np.arange(prices.shape[1])
+    first = has_price.argmax(axis=0)
+    last = len(prices) - 1 - has_price[::-1].argmax(axis=0)
+    any_price = has_price.any(axis=0)
+    return (np.where(any_price, prices[first, columns], np.nan),
+            np.where(any_price, prices[last, columns], np.nan))
+
+def _report_skipped(tickers, has_data, start_date, end_date):
+    skipped = [ticker for ticker, ok in zip(tickers, has_data) if not ok]
+    if skipped:
+        print(f"No data for {', '.join(skipped)} between {start_date} and {end_date}. Skipping.")
+
+def calculate_values(portfolio, start_date, end_date, closes=None):
+    # Zero-share entries contribute nothing, so don't spend a request on them
+    portfolio = [(ticker.upper(), shares) for ticker, shares in portfolio if shares > 0]
+    tickers = [ticker for ticker, _ in portfolio]
+    shares = np.array([shares for _, shares in portfolio], dtype=float)
+
+    if closes is None:
+        closes = fetch_closes(tickers, start_date, end_date) if tickers else pd.DataFrame()
+
+    start_prices, end_prices = _endpoints(closes.reindex(columns=tickers))
+    valid = ~np.isnan(start_prices)
+    _report_skipped(tickers, valid, start_date, end_date)
+
+    # Tickers without data contribute zero, so the totals need no masking
+    start_values = np.nan_to_num(start_prices) * shares
+    end_values = np.nan_to_num(end_prices) * shares
+    value_changes = end_values - start_values
+    with np.errstate(divide='ignore', invalid='ignore'):
+        percent_changes = (value_changes / start_values) * 100
+
+    total_start_value = start_values.sum()
+    total_end_value = end_values.sum()
+    total_value_change = value_changes.sum()
+
+    rows = zip(tickers, shares, start_prices, end_prices, start_values, end_values, percent_changes, value_changes)
+    data = [list(row) for row, ok in zip(rows, valid) if ok]
 
     if total_start_value == 0:
         print("Total start value is zero, cannot calculate overall percent change.")
@@ -91,35 +176,36 @@ def calculate_values(portfolio, start_date, end_date):
 #     print(colored(f"Total end value: ${total_end_value:,.2f}", 'green'))
 #     print(colored(f"Overall percent change: {percent_change:.2f}%", 'yellow'))
 #     print(colored(f"Total value change: ${total_value_change:,.2f}", 'yellow'))
+@lru_cache(maxsize=None)
+def _color_template(color):
+    from termcolor import colored
+
+    # Resolve the ANSI prefix/suffix once per color instead of once per cell
+    return colored('{}', color)
+
+def _fmt(value, money=True):
+    if np.isnan(value):
+        return ''
+    text = f"${value:,.2f}" if money else f"{value:.2f}%"
+    return _color_template('green' if value >= 0 else 'red').format(text)
+
 def print_results(data, start_date, end_date, total_start_value, total_end_value, percent_change, total_value_change):
-    df = pd.DataFrame(data, columns=[
-        'Ticker', 'Shares', 'Start Price', 'End Price', 'Start Value', 'End Value', 'Percent Change (%)', 'Value Change (USD)'
-    ])
-
-    # Calculate summation and average
-    total_end_value_sum = df['End Value'].sum()
-    average_percent_change = df['Percent Change (%)'].mean()
-
-    # Create the summation row
-    summation_row = pd.DataFrame([{
-        'Ticker': 'Summation',
-        'Shares': '',
-        'Start Price': '',
-        'End Price': '',
-        'Start Value': '',
-        'End Value': total_end_value_sum,
-        'Percent Change (%)': average_percent_change,
-        'Value Change (USD)': ''
-    }])
-
-    # Concatenate the summation row to the original DataFrame
-    df = pd.concat([df, summation_row], ignore_index=True)
-
-    # Format all prices and values as USD
-    for column in ['Start Price', 'End Price', 'Start Value', 'End Value', 'Value Change (USD)']:
-        df[column] = df[column].map(lambda x: f"${x:,.2f}" if x != '' else '')
-
-    table = tabulate(df, headers='keys', tablefmt='fancy_grid', showindex=False)
+    from tabulate import tabulate
+    from termcolor import colored
+
+    # Format all prices and values as USD, coloring the changes by sign
+    rows = [
+        [ticker, shares, f"${start_price:,.2f}", f"${end_price:,.2f}", f"${start_value:,.2f}", f"${end_value:,.2f}",
+         _fmt(row_percent_change, money=False), _fmt(value_change)]
+        for ticker, shares, start_price, end_price, start_value, end_value, row_percent_change, value_change in data
+    ]
+
+    # Append the summation row with the total end value and average percent change
+    total_end_value_sum = sum(row[5] for row in data)
+    average_percent_change = np.nanmean([row[6] for row in data]) if data else np.nan
+    rows.append(['Summation', '', '', '', '', f"${total_end_value_sum:,.2f}", _fmt(average_percent_change, money=False), ''])
+
+    table = tabulate(rows, headers=RESULT_HEADERS, tablefmt='fancy_grid')
     print(colored(f"\nPortfolio performance from {start_date} to {end_date}:", 'cyan'))
     print(table)
     print(colored(f"\nTotal start value: ${total_start_value:,.2f}", 'green'))
@@ -127,6 +213,8 @@ def print_results(data, start_date, end_date, total_start_value, total_end_value
     print(colored(f"Overall percent change: {percent_change:.2f}%", 'yellow'))
     print(colored(f"Total value change: ${total_value_change:,.2f}", 'yellow'))
 
+# Computed once per run so every entry agrees even if the clock crosses 16:00
+@lru_cache(maxsize=1)
 def get_previous_market_close():
     now = datetime.now()
     if now.hour < 16:
@@ -135,63 +223,97 @@ def get_previous_market_close():
     return previous_close.strftime('%Y-%m-%d')
 
 def save_to_history(name, portfolio, start_date, end_date):
+    write_header = not os.path.exists(HISTORY_FILE)
     with open(HISTORY_FILE, 'a', newline='') as f:
         writer = csv.writer(f)
+        if write_header:
+            writer.writerow(HISTORY_COLUMNS)
         writer.writerow([name, portfolio, start_date, end_date])
 
 def load_history():
-    if not os.path.exists(HISTORY_FILE):
-        return []
-    with open(HISTORY_FILE, 'r') as f:
-        reader = csv.reader(f)
-        return list(reader)
+    # An empty file can't be memory-mapped
+    if not os.path.exists(HISTORY_FILE) or os.path.getsize(HISTORY_FILE) == 0:
+        return pd.DataFrame(columns=HISTORY_COLUMNS)
+    # Older files were written without a header row
+    with open(HISTORY_FILE, newline='') as f:
+        has_header = f.readline().rstrip('\r\n') == ','.join(HISTORY_COLUMNS)
+    # Map the file instead of reading it through a Python buffer; the C parser reads the mapping directly
+    history = pd.read_csv(HISTORY_FILE, names=HISTORY_COLUMNS, header=0 if has_header else None, dtype=str,
+                          keep_default_na=False, memory_map=True)
+    # Saves only append, so a later entry for the same name and date range overrides earlier ones
+    history = history.drop_duplicates(subset=['name', 'start_date', 'end_date'], keep='last')
+    return history.reset_index(drop=True)
+
+def _portfolio_totals(portfolios, closes, start_date, end_date):
+    # Start and end values of several portfolios over one window as a single matrix product
+    column = {ticker: i for i, ticker in enumerate(closes.columns)}
+    shares = np.zeros((len(portfolios), len(column)))
+    for row, portfolio in enumerate(portfolios):
+        for ticker, count in portfolio:
+            if count > 0:
+                shares[row, column[ticker.upper()]] += count
+
+    start_prices, end_prices = _endpoints(closes)
+    _report_skipped(closes.columns, ~np.isnan(start_prices), start_date, end_date)
+
+    return shares @ np.nan_to_num(start_prices), shares @ np.nan_to_num(end_prices)
+
+def compare_portfolios(portfolios, max_workers=MAX_WORKERS):
+    from tabulate import tabulate
 
-def compare_portfolios(portfolios):
     history = load_history()
-    comparison_data = []
 
+    # Select every requested portfolio in one pass over the history
+    matches = history[history['name'].isin(portfolios)].groupby('name', sort=False)
+    found = {name: list(group.itertuples(index=False)) for name, group in matches}
+    matching_entries = {name: found.get(name, []) for name in portfolios}
     for portfolio_name in portfolios:
-        matching_entries = [entry for entry in history if entry[0] == portfolio_name]
-        if not matching_entries:
+        if not matching_entries[portfolio_name]:
             print(f"No history found for portfolio '{portfolio_name}'. Skipping.")
-            continue
 
-        for entry in matching_entries:
-            name, portfolio_str, start_date, end_date = entry
-            portfolio = parse_portfolio(portfolio_str)
-            data, total_start_value, total_end_value, percent_change, total_value_change = calculate_values(portfolio, start_date, end_date)
-            comparison_data.append([
-                name,
-                start_date,
-                end_date,
-                total_start_value,
-                total_end_value,
-                percent_change,
-                total_value_change
-            ])
-
-    comparison_df = pd.DataFrame(comparison_data, columns=[
-        'Name', 'Start Date', 'End Date', 'Start Value', 'End Value', 'Percent Change (%)', 'Value Change (USD)'
-    ])
-    comparison_table = tabulate(comparison_df, headers='keys', tablefmt='fancy_grid', showindex=False)
+    entries = [entry for portfolio_name in portfolios for entry in matching_entries[portfolio_name]]
+    start_values = np.zeros(len(entries))
+    end_values = np.zeros(len(entries))
+    for (start_date, end_date), closes in fetch_windows(entries, max_workers).items():
+        rows = [i for i, entry in enumerate(entries) if (entry[2], entry[3]) == (start_date, end_date)]
+        portfolios_in_window = [parse_portfolio(entries[i][1]) for i in rows]
+        start_values[rows], end_values[rows] = _portfolio_totals(portfolios_in_window, closes, start_date, end_date)
+
+    value_changes = end_values - start_values
+    for start_value in start_values:
+        if start_value == 0:
+            print("Total start value is zero, cannot calculate overall percent change.")
+    with np.errstate(divide='ignore', invalid='ignore'):
+        percent_changes = np.where(start_values == 0, 0, (value_changes / start_values) * 100)
+
+    comparison_data = [
+        [name, start_date, end_date, start_value, end_value, percent_change, value_change]
+        for (name, _, start_date, end_date), start_value, end_value, percent_change, value_change
+        in zip(entries, start_values, end_values, percent_changes, value_changes)
+    ]
+
+    comparison_table = tabulate(comparison_data, headers=COMPARISON_HEADERS, tablefmt='fancy_grid')
     print(comparison_table)
 
 def main():
     args = parse_args()
 
     if args.aggregate:
-        history = load_history()
+        default_end = get_previous_market_close()
+        history = [[name, portfolio_str, start_date, end_date or default_end]
+                   for name, portfolio_str, start_date, end_date in load_history().itertuples(index=False)]
+        closes = fetch_windows(history, args.threads)
         for entry in history:
             name, portfolio_str, start_date, end_date = entry
             portfolio = parse_portfolio(portfolio_str)
-            data, total_start_value, total_end_value, percent_change, total_value_change = calculate_values(portfolio, start_date, end_date or get_previous_market_close())
-            print_results(data, start_date, end_date or get_previous_market_close(), total_start_value, total_end_value, percent_change, total_value_change)
+            data, total_start_value, total_end_value, percent_change, total_value_change = calculate_values(portfolio, start_date, end_date, closes[start_date, end_date])
+            print_results(data, start_date, end_date, total_start_value, total_end_value, percent_change, total_value_change)
     elif args.compare:
         portfolios = args.compare.split(',')
         if len(portfolios) > 5:
             print("You can compare up to 5 portfolios at a time.")
             return
-        compare_portfolios(portfolios)
+        compare_portfolios(portfolios, args.threads)
     else:
         start_date = args.frm.replace('.', '-')
         end_date = args.to
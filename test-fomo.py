@@ -23,17 +23,17 @@ def fuzz_test_parse_portfolio():
         print(f"parse_portfolio failed: {e}")
         traceback.print_exc()
 
-def fuzz_test_fetch_stock_data():
-    print("Testing fetch_stock_data...")
+def fuzz_test_fetch_closes():
+    print("Testing fetch_closes...")
     try:
         random_ticker = random_string()
         start_date = datetime.now() - timedelta(days=30)
         end_date = datetime.now()
-        result = fetch_stock_data(random_ticker, start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d'))
+        result = fetch_closes([random_ticker], start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d'))
         assert isinstance(result, pd.DataFrame), f"Expected DataFrame, got {type(result)}"
-        print("fetch_stock_data passed")
+        print("fetch_closes passed")
     except Exception as e:
-        print(f"fetch_stock_data failed: {e}")
+        print(f"fetch_closes failed: {e}")
         traceback.print_exc()
 
 def fuzz_test_calculate_values():
@@ -64,7 +64,7 @@ def fuzz_test_compare_portfolios():
 
 def main():
     fuzz_test_parse_portfolio()
-    fuzz_test_fetch_stock_data()
+    fuzz_test_fetch_closes()
     fuzz_test_calculate_values()
     fuzz_test_compare_portfolios()
 
@@ -0,0 +1,51 @@
+import os
+import pickle
+import time
+
+import pytest
+
+import cache
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, 'CACHE_DIR', tmp_path)
+    return tmp_path
+
+def test_round_trip():
+    key = cache.make_key('VOO', '2024-01-01', '2024-02-01', 'Adj Close')
+    cache.put(key, [1.0, 2.0])
+    assert cache.get(key) == [1.0, 2.0]
+
+def test_missing_key_is_a_miss():
+    assert cache.get(cache.make_key('NOPE')) is None
+
+def test_ttl_expires_old_entries(cache_dir):
+    key = cache.make_key('VOO')
+    cache.put(key, 1)
+    old = time.time() - 120
+    os.utime(cache_dir / f'{key}.pkl', (old, old))
+    assert cache.get(key, ttl=60) is None
+    assert cache.get(key, ttl=300) == 1
+    assert cache.get(key) == 1
+
+def test_corrupt_file_is_a_miss_and_removed(cache_dir):
+    key = cache.make_key('VOO')
+    path = cache_dir / f'{key}.pkl'
+    path.write_bytes(b'not a pickle')
+    assert cache.get(key) is None
+    assert not path.exists()
+
+def test_unloadable_pickle_is_a_miss_and_removed(cache_dir):
+    # Mimics a frame pickled by a pandas version whose modules no longer exist
+    key = cache.make_key('VOO')
+    path = cache_dir / f'{key}.pkl'
+    path.write_bytes(b'cno_such_module\nThing\n.')
+    with pytest.raises(ModuleNotFoundError):
+        pickle.loads(path.read_bytes())
+    assert cache.get(key) is None
+    assert not path.exists()
+
+def test_failed_put_leaves_no_temp_file(cache_dir):
+    with pytest.raises(Exception):
+        cache.put(cache.make_key('VOO'), lambda: None)
+    assert list(cache_dir.iterdir()) == []
@@ -0,0 +1,44 @@
+import pandas as pd
+import pytest
+
+import fomo
+
+@pytest.fixture
+def history_file(tmp_path, monkeypatch):
+    path = tmp_path / 'portfolio_history.csv'
+    monkeypatch.setattr(fomo, 'HISTORY_FILE', str(path))
+    return path
+
+def test_missing_file_loads_empty(history_file):
+    history = fomo.load_history()
+    assert isinstance(history, pd.DataFrame)
+    assert list(history.columns) == fomo.HISTORY_COLUMNS
+    assert history.empty
+
+def test_empty_file_loads_empty(history_file):
+    history_file.write_text('')
+    history = fomo.load_history()
+    assert list(history.columns) == fomo.HISTORY_COLUMNS
+    assert history.empty
+
+def test_file_with_header(history_file):
+    history_file.write_text('name,portfolio,start_date,end_date\n'
+                            'ROTH,"VOO(1.5),VTSAX(2)",2024-01-01,2024-02-01\n')
+    assert fomo.load_history().values.tolist() == [['ROTH', 'VOO(1.5),VTSAX(2)', '2024-01-01', '2024-02-01']]
+
+def test_file_without_header(history_file):
+    history_file.write_text('ROTH,VOO(1),2024-01-01,\n'
+                            'IRA,VTSAX(2),2024-03-01,2024-04-01\n')
+    assert fomo.load_history().values.tolist() == [['ROTH', 'VOO(1)', '2024-01-01', ''],
+                                                   ['IRA', 'VTSAX(2)', '2024-03-01', '2024-04-01']]
+
+def test_portfolio_named_name_is_kept(history_file):
+    fomo.save_to_history('name', 'VOO(1)', '2024-01-01', '2024-02-01')
+    assert fomo.load_history().values.tolist() == [['name', 'VOO(1)', '2024-01-01', '2024-02-01']]
+
+def test_resave_keeps_latest_portfolio(history_file):
+    fomo.save_to_history('ROTH', 'VOO(1)', '2024-01-01', '2024-02-01')
+    fomo.save_to_history('ROTH', 'VOO(1)', '2024-03-01', '2024-04-01')
+    fomo.save_to_history('ROTH', 'VOO(2),MSTR(3)', '2024-01-01', '2024-02-01')
+    assert fomo.load_history().values.tolist() == [['ROTH', 'VOO(1)', '2024-03-01', '2024-04-01'],
+                                                   ['ROTH', 'VOO(2),MSTR(3)', '2024-01-01', '2024-02-01']]
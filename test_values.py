@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import cache
+import fomo
+
+DATES = pd.date_range('2024-01-01', periods=3, freq='B')
+PRICES = {
+    'VOO': [10.0, 11.0, 12.0],
+    'MSTR': [20.0, 25.0, 30.0],
+}
+
+@pytest.fixture
+def downloads(tmp_path, monkeypatch):
+    yf = pytest.importorskip('yfinance')
+    calls = []
+
+    # Like yfinance, upper-case the symbols and return a column-grouped frame
+    def download(tickers, **kwargs):
+        tickers = [ticker.upper() for ticker in tickers]
+        calls.append(tickers)
+        columns = {('Adj Close', ticker): PRICES.get(ticker, [np.nan] * len(DATES)) for ticker in tickers}
+        return pd.DataFrame(columns, index=DATES)
+
+    monkeypatch.setattr(yf, 'download', download)
+    monkeypatch.setattr(fomo, '_session', lambda: None)
+    monkeypatch.setattr(cache, 'CACHE_DIR', tmp_path / '.cache')
+    return calls
+
+def test_lowercase_tickers_match_download_columns(downloads):
+    data, total_start, total_end, percent_change, value_change = fomo.calculate_values(
+        (('voo', 2.0),), '2024-01-01', '2024-01-04')
+    assert [row[0] for row in data] == ['VOO']
+    assert (total_start, total_end, value_change) == (20.0, 24.0, 4.0)
+    assert percent_change == pytest.approx(20.0)
+    assert downloads == [['VOO']]
+
+def test_lowercase_tickers_share_the_cache(downloads):
+    fomo.fetch_closes(['voo'], '2024-01-01', '2024-01-04')
+    closes = fomo.fetch_closes(['VOO'], '2024-01-01', '2024-01-04')
+    assert list(closes.columns) == ['VOO']
+    assert len(downloads) == 1
+
+def test_window_is_cached_as_one_frame(downloads):
+    fomo.fetch_closes(['VOO', 'MSTR'], '2024-01-01', '2024-01-04')
+    closes = fomo.fetch_closes(['MSTR', 'VOO'], '2024-01-01', '2024-01-04')
+    assert list(closes.columns) == ['MSTR', 'VOO']
+    assert downloads == [['VOO', 'MSTR']]
+    # A different ticker set is its own window, so it never mixes bases with the cached one
+    fomo.fetch_closes(['VOO'], '2024-01-01', '2024-01-04')
+    assert downloads == [['VOO', 'MSTR'], ['VOO']]
+
+def test_window_with_missing_ticker_is_not_cached(downloads):
+    fomo.fetch_closes(['VOO', 'GONE'], '2024-01-01', '2024-01-04')
+    fomo.fetch_closes(['VOO', 'GONE'], '2024-01-01', '2024-01-04')
+    assert len(downloads) == 2
+
+def test_endpoints_skip_leading_and_trailing_gaps():
+    closes = pd.DataFrame({
+        'A': [np.nan, 2.0, 3.0, np.nan],
+        'B': [1.0, np.nan, np.nan, 4.0],
+        'C': [np.nan] * 4,
+    })
+    start_prices, end_prices = fomo._endpoints(closes)
+    np.testing.assert_array_equal(start_prices, [2.0, 1.0, np.nan])
+    np.testing.assert_array_equal(end_prices, [3.0, 4.0, np.nan])
+
+def test_ticker_without_data_is_zeroed_and_reported(downloads, capsys):
+    data, total_start, total_end, percent_change, value_change = fomo.calculate_values(
+        (('VOO', 2.0), ('GONE', 5.0)), '2024-01-01', '2024-01-04')
+    assert [row[0] for row in data] == ['VOO']
+    assert (total_start, total_end, value_change) == (20.0, 24.0, 4.0)
+    assert 'No data for GONE between 2024-01-01 and 2024-01-04' in capsys.readouterr().out
+
+def test_zero_share_entries_are_not_fetched(downloads):
+    data, total_start, total_end, _, _ = fomo.calculate_values(
+        (('VOO', 2.0), ('MSTR', 0.0)), '2024-01-01', '2024-01-04')
+    assert [row[0] for row in data] == ['VOO']
+    assert (total_start, total_end) == (20.0, 24.0)
+    assert downloads == [['VOO']]
+
+def test_duplicate_tickers_are_fetched_once_and_both_counted(downloads):
+    data, total_start, total_end, percent_change, _ = fomo.calculate_values(
+        (('VOO', 1.0), ('VOO', 2.0)), '2024-01-01', '2024-01-04')
+    assert [row[1] for row in data] == [1.0, 2.0]
+    assert (total_start, total_end) == (30.0, 36.0)
+    assert percent_change == pytest.approx(20.0)
+    assert downloads == [['VOO']]
+
+@pytest.fixture
+def compared(downloads, tmp_path, monkeypatch):
+    tabulate = pytest.importorskip('tabulate')
+    tables = []
+    monkeypatch.setattr(tabulate, 'tabulate', lambda rows, **kwargs: tables.append(rows) or '')
+    monkeypatch.setattr(fomo, 'HISTORY_FILE', str(tmp_path / 'portfolio_history.csv'))
+    return tables
+
+def test_compared_portfolios_share_one_window_download(downloads, compared):
+    fomo.save_to_history('A', 'VOO(2)', '2024-01-01', '2024-01-04')
+    fomo.save_to_history('B', 'VOO(1),MSTR(1)', '2024-01-01', '2024-01-04')
+    fomo.compare_portfolios(['A', 'B'])
+    assert downloads == [['VOO', 'MSTR']]
+    [rows] = compared
+    assert [row[:5] for row in rows] == [['A', '2024-01-01', '2024-01-04', 20.0, 24.0],
+                                         ['B', '2024-01-01', '2024-01-04', 30.0, 42.0]]
+    assert [row[5] for row in rows] == pytest.approx([20.0, 40.0])
+
+def test_compare_reports_zero_start_value(downloads, compared, capsys):
+    fomo.save_to_history('EMPTY', 'GONE(1)', '2024-01-01', '2024-01-04')
+    fomo.compare_portfolios(['EMPTY'])
+    [rows] = compared
+    assert rows[0][3:] == [0.0, 0.0, 0.0, 0.0]
+    assert 'Total start value is zero' in capsys.readouterr().out